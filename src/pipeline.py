@@ -5,13 +5,26 @@ This module contains the Prefect flow and tasks for processing ECB currency exch
 """
 import os
 import csv
+import shutil
 import requests
 import pandas as pd
-from datetime import datetime
-from typing import List, Dict, Set, Tuple
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import FrozenSet, List, Dict, Set, Tuple
 from pathlib import Path
 
-from prefect import flow, task
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# PyArrow parses CSV in multithreaded C++ and can skip unwanted columns
+# entirely, and backs the Parquet format used for the cleaned data
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pyarrow import csv as pacsv
+
+from prefect import flow, task, unmapped
+from prefect.task_runners import ConcurrentTaskRunner
 from prefect.tasks import task_input_hash
 from datetime import timedelta
 
@@ -19,8 +32,54 @@ from datetime import timedelta
 DATA_DIR = Path("data")
 CURRENCY_PAIRS = ["USD", "SEK", "NOK", "DKK"]  # Base currency is EUR
 
+# Shared HTTP session so the per-currency downloads reuse pooled TCP/TLS
+# connections instead of paying a full handshake per request.
+# Retries happen at the transport level, which keeps the connection alive
+# across attempts.
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]),
+    ),
+)
+
+
+def _cache_key_if_outputs_exist(output_files_fn):
+    """
+    Build a cache_key_fn for tasks whose essential result is a file on disk.
 
-@task(retries=3, retry_delay_seconds=5)
+    Falls back to task_input_hash, but returns None (forcing re-execution)
+    when any of the task's output files is missing, so a cached result can
+    never point at files that have since been deleted.
+
+    Args:
+        output_files_fn: Maps the task's parameters dict to the list of
+            output file paths the task is expected to have written
+
+    Returns:
+        A cache_key_fn for the @task decorator
+    """
+    def cache_key_fn(context, parameters):
+        if not all(path.exists() for path in output_files_fn(parameters)):
+            return None
+        return task_input_hash(context, parameters)
+
+    return cache_key_fn
+
+
+def _download_output_files(parameters):
+    """Output files of download_currency_data for the given parameters."""
+    return [DATA_DIR / f"ECB_EUR_{parameters['currency']}.csv"]
+
+
+@task(
+    cache_key_fn=_cache_key_if_outputs_exist(_download_output_files),
+    cache_expiration=timedelta(hours=24),
+    persist_result=True,
+)
 def download_currency_data(currency: str) -> Path:
     """
     Download currency exchange rate data from ECB for a specific currency pair.
@@ -37,33 +96,78 @@ def download_currency_data(currency: str) -> Path:
     # Construct the output file path
     output_file = DATA_DIR / f"ECB_EUR_{currency}.csv"
 
-    # Check if file already exists and is recent (less than 24 hours old)
-    if output_file.exists():
-        file_age = datetime.now().timestamp() - output_file.stat().st_mtime
-        if file_age < 24 * 60 * 60:  # Less than 24 hours old
-            print(f"Using existing file for EUR/{currency}: {output_file}")
-            return output_file
-
     # Construct the URL for the ECB API
     url = f"https://data-api.ecb.europa.eu/service/data/EXR/D.{currency}.EUR.SP00.A?format=csvdata"
 
+    # Build conditional request headers so an unchanged CSV comes back as a
+    # bodyless 304 Not Modified instead of a full re-download
+    etag_file = output_file.with_suffix(output_file.suffix + ".etag")
+    headers = {}
+    if output_file.exists():
+        headers["If-Modified-Since"] = formatdate(output_file.stat().st_mtime, usegmt=True)
+        if etag_file.exists():
+            headers["If-None-Match"] = etag_file.read_text().strip()
+
     print(f"Downloading EUR/{currency} data from {url}")
 
-    # Download the data
-    response = requests.get(url)
-    response.raise_for_status()  # Raise an exception for HTTP errors
+    # Download the data over the pooled session and stream it straight to disk
+    with _SESSION.get(url, headers=headers, stream=True, timeout=(3.05, 30)) as response:
+        if response.status_code == 304:
+            # Server confirmed the cached file is still current; refresh its
+            # mtime so the freshness check keeps working
+            print(f"EUR/{currency} data not modified, using existing file: {output_file}")
+            os.utime(output_file, None)
+            return output_file
 
-    # Save the data to a CSV file
-    with open(output_file, "w", newline="") as f:
-        f.write(response.text)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+
+        # Decompress while streaming: response.raw yields the transport bytes
+        # as-is, so without this a gzip-encoded response would be saved as
+        # gzip bytes instead of CSV
+        response.raw.decode_content = True
+
+        # Stream to a temp file and move it into place atomically so a crash
+        # mid-download cannot leave a torn file that later runs would trust
+        tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+        with open(tmp_file, "wb") as f:
+            shutil.copyfileobj(response.raw, f)
+        os.replace(tmp_file, output_file)
+
+        # Remember the ETag for the next conditional request
+        etag = response.headers.get("ETag")
+        if etag:
+            etag_file.write_text(etag)
+        elif etag_file.exists():
+            etag_file.unlink()
 
     print(f"Saved EUR/{currency} data to {output_file}")
 
     return output_file
 
 
-@task
-def clean_up_currency_data(file_path: Path) -> Path:
+@dataclass
+class CleanedData:
+    """
+    Cleaned currency data with the parsed DataFrame kept in memory so
+    downstream tasks do not have to re-read the cleaned file from disk.
+    """
+    path: Path
+    dates: FrozenSet[str]
+    df: pd.DataFrame
+
+
+def _clean_up_output_files(parameters):
+    """Output files of clean_up_currency_data for the given parameters."""
+    currency = parameters['file_path'].name.replace("ECB_EUR_", "").replace(".csv", "")
+    return [DATA_DIR / f"EUR_{currency}.parquet"]
+
+
+@task(
+    cache_key_fn=_cache_key_if_outputs_exist(_clean_up_output_files),
+    cache_expiration=timedelta(hours=24),
+    persist_result=True,
+)
+def clean_up_currency_data(file_path: Path) -> CleanedData:
     """
     Clean up downloaded ECB CSV file by extracting only the required columns.
 
@@ -71,61 +175,53 @@ def clean_up_currency_data(file_path: Path) -> Path:
         file_path: Path to the ECB CSV file
 
     Returns:
-        Path to the cleaned CSV file
+        CleanedData with the path to the cleaned Parquet file, the set of
+        dates and the cleaned DataFrame
     """
     # Extract the currency from the file name
     file_name = file_path.name
     currency = file_name.replace("ECB_EUR_", "").replace(".csv", "")
 
     # Construct the output file path
-    output_file = DATA_DIR / f"EUR_{currency}.csv"
+    output_file = DATA_DIR / f"EUR_{currency}.parquet"
 
     try:
-        # Read the CSV file using pandas
-        df = pd.read_csv(file_path)
+        # Read only the date and rate columns; everything else is either
+        # never used or, like CURRENCY and CURRENCY_DENOM, constant within
+        # the file and recoverable from the file name
+        try:
+            # Pin TIME_PERIOD to string: Arrow would otherwise infer date32
+            # and downstream steps rely on the YYYY-MM-DD strings
+            table = pacsv.read_csv(
+                file_path,
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=['TIME_PERIOD', 'OBS_VALUE'],
+                    column_types={'TIME_PERIOD': pa.string()},
+                ),
+            )
+        except KeyError:
+            print(f"Warning: Required columns not found in {file_path}")
+            return None
 
-        # Extract only the required columns
-        if all(col in df.columns for col in ['CURRENCY', 'CURRENCY_DENOM', 'TIME_PERIOD', 'OBS_VALUE']):
-            cleaned_df = df[['CURRENCY', 'CURRENCY_DENOM', 'TIME_PERIOD', 'OBS_VALUE']]
+        # Rename TIME_PERIOD -> DATE and OBS_VALUE -> RATE
+        table = table.rename_columns(['DATE', 'RATE'])
 
-            # Rename columns
-            cleaned_df = cleaned_df.rename(columns={
-                'TIME_PERIOD': 'DATE',
-                'OBS_VALUE': 'RATE'
-            })
+        # Write to Parquet; columnar and compressed, so it is both smaller
+        # and much faster to read back than CSV. Written via a temp file so
+        # the cleaned file only ever appears fully formed.
+        tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+        pq.write_table(table, tmp_file, compression='zstd')
+        os.replace(tmp_file, output_file)
 
-            # Write to CSV
-            cleaned_df.to_csv(output_file, index=False)
+        dates = frozenset(pc.unique(table.column('DATE')).to_pylist())
+        cleaned_df = table.to_pandas()
 
-            print(f"Saved cleaned data for EUR/{currency} to {output_file}")
-        else:
-            print(f"Warning: Required columns not found in {file_path}")
-            return None
+        print(f"Saved cleaned data for EUR/{currency} to {output_file}")
     except Exception as e:
         print(f"Error cleaning up data for {file_path}: {e}")
         return None
 
-    return output_file
-
-
-@task
-def collect_currency_pairs(file_path: Path) -> Set[str]:
-    """
-    Extract currency pairs from a cleaned CSV file.
-
-    Args:
-        file_path: Path to the cleaned CSV file (EUR_*.csv)
-
-    Returns:
-        Set of currency pairs (e.g., "EUR_USD")
-    """
-    # Extract the currency pair from the file name
-    file_name = file_path.name
-
-    # The file name is in the format "EUR_USD.csv"
-    currency_pair = file_name.replace(".csv", "")
-
-    return {currency_pair}
+    return CleanedData(path=output_file, dates=dates, df=cleaned_df)
 
 
 @task
@@ -145,12 +241,12 @@ def write_currency_pairs_to_csv(currency_pairs: Set[str]) -> Path:
     # Construct the output file path
     output_file = DATA_DIR / "pairs.csv"
 
-    # Write the currency pairs to a CSV file
-    with open(output_file, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["currency_pair"])  # Header
-        for pair in sorted(currency_pairs):
-            writer.writerow([pair])
+    # The pairs are ASCII-safe slugs, so build the whole file in one string
+    # and write it with a single call, atomically via a temp file
+    lines = ["currency_pair"] + sorted(currency_pairs)
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    tmp_file.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_file, output_file)
 
     print(f"Saved currency pairs to {output_file}")
 
@@ -158,21 +254,19 @@ def write_currency_pairs_to_csv(currency_pairs: Set[str]) -> Path:
 
 
 @flow(name="Collect Currency Pairs Flow")
-def collect_currency_pairs_flow(input_files: List[Path]) -> Path:
+def collect_currency_pairs_flow(cleaned_data: List[CleanedData]) -> Path:
     """
-    Collect currency pairs from downloaded ECB CSV files.
+    Collect currency pairs from cleaned currency data.
 
     Args:
-        input_files: List of paths to the downloaded CSV files
+        cleaned_data: List of cleaned currency data
 
     Returns:
         Path to the saved currency pairs CSV file
     """
-    # Extract currency pairs from each file
-    all_currency_pairs = set()
-    for file_path in input_files:
-        pairs = collect_currency_pairs(file_path)
-        all_currency_pairs.update(pairs)
+    # The file stem is the currency pair, e.g. "EUR_USD.parquet" -> "EUR_USD".
+    # This is plain string manipulation, so it is not worth a task per file.
+    all_currency_pairs = {cleaned.path.stem for cleaned in cleaned_data}
 
     # Write the currency pairs to a CSV file
     output_file = write_currency_pairs_to_csv(all_currency_pairs)
@@ -180,7 +274,7 @@ def collect_currency_pairs_flow(input_files: List[Path]) -> Path:
     return output_file
 
 
-@flow(name="Download Currency Data Flow")
+@flow(name="Download Currency Data Flow", task_runner=ConcurrentTaskRunner())
 def download_currency_data_flow() -> List[Path]:
     """
     Download currency exchange rate data for all specified currency pairs.
@@ -188,17 +282,14 @@ def download_currency_data_flow() -> List[Path]:
     Returns:
         List of paths to the downloaded CSV files
     """
-    # Use fan-out to download data for each currency pair in parallel
-    downloaded_files = []
-    for currency in CURRENCY_PAIRS:
-        file_path = download_currency_data(currency)
-        downloaded_files.append(file_path)
+    # Fan out the downloads so the HTTP requests overlap on the task runner
+    futures = [download_currency_data.submit(currency) for currency in CURRENCY_PAIRS]
 
-    return downloaded_files
+    return [future.result() for future in futures]
 
 
-@flow(name="Clean Up Currency Data Flow")
-def clean_up_currency_data_flow(input_files: List[Path]) -> List[Path]:
+@flow(name="Clean Up Currency Data Flow", task_runner=ConcurrentTaskRunner())
+def clean_up_currency_data_flow(input_files: List[Path]) -> List[CleanedData]:
     """
     Clean up downloaded ECB CSV files by extracting only the required columns.
 
@@ -206,46 +297,12 @@ def clean_up_currency_data_flow(input_files: List[Path]) -> List[Path]:
         input_files: List of paths to the downloaded ECB CSV files
 
     Returns:
-        List of paths to the cleaned CSV files
+        List of cleaned currency data
     """
-    # Clean up each file
-    cleaned_files = []
-    for file_path in input_files:
-        cleaned_file = clean_up_currency_data(file_path)
-        if cleaned_file:
-            cleaned_files.append(cleaned_file)
-
-    return cleaned_files
-
-
-@task
-def collect_dates(file_path: Path) -> Set[str]:
-    """
-    Extract dates from a cleaned CSV file.
-
-    Args:
-        file_path: Path to the cleaned CSV file
-
-    Returns:
-        Set of dates (YYYY-MM-DD format)
-    """
-    dates = set()
-
-    # Read the CSV file using pandas
-    try:
-        # Read the cleaned CSV file
-        df = pd.read_csv(file_path)
-
-        # In cleaned files, the date column is named 'DATE'
-        if 'DATE' in df.columns:
-            # Extract unique dates
-            dates.update(df['DATE'].unique())
-        else:
-            print(f"Warning: No DATE column found in {file_path}")
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
+    # Clean up the files in parallel since each file is independent
+    futures = clean_up_currency_data.map(input_files)
 
-    return dates
+    return [result for result in (future.result() for future in futures) if result]
 
 
 @task
@@ -265,12 +322,12 @@ def write_dates_to_csv(dates: Set[str]) -> Path:
     # Construct the output file path
     output_file = DATA_DIR / "dates.csv"
 
-    # Write the dates to a CSV file
-    with open(output_file, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["date"])  # Header
-        for date in sorted(dates):
-            writer.writerow([date])
+    # The dates are plain ISO strings, so build the whole file in one string
+    # and write it with a single call, atomically via a temp file
+    lines = ["date"] + sorted(dates)
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    tmp_file.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_file, output_file)
 
     print(f"Saved dates to {output_file}")
 
@@ -278,21 +335,18 @@ def write_dates_to_csv(dates: Set[str]) -> Path:
 
 
 @flow(name="Collect Dates Flow")
-def collect_dates_flow(input_files: List[Path]) -> Path:
+def collect_dates_flow(cleaned_data: List[CleanedData]) -> Path:
     """
-    Collect dates from downloaded ECB CSV files.
+    Collect dates from cleaned currency data.
 
     Args:
-        input_files: List of paths to the downloaded CSV files
+        cleaned_data: List of cleaned currency data
 
     Returns:
         Path to the saved dates CSV file
     """
-    # Extract dates from each file
-    all_dates = set()
-    for file_path in input_files:
-        dates = collect_dates(file_path)
-        all_dates.update(dates)
+    # The dates were already collected while cleaning, so just union them
+    all_dates = set().union(*(cleaned.dates for cleaned in cleaned_data))
 
     # Write the dates to a CSV file
     output_file = write_dates_to_csv(all_dates)
@@ -300,139 +354,147 @@ def collect_dates_flow(input_files: List[Path]) -> Path:
     return output_file
 
 
-@task
-def compute_monthly_stats(file_path: Path) -> Path:
+def _monthly_stats_output_files(parameters):
+    """Output files of compute_monthly_stats for the given parameters."""
+    return [
+        DATA_DIR / f"{cleaned.path.stem}_monthly_stats.csv"
+        for cleaned in parameters['cleaned_data']
+    ]
+
+
+@task(
+    cache_key_fn=_cache_key_if_outputs_exist(_monthly_stats_output_files),
+    cache_expiration=timedelta(hours=24),
+    persist_result=True,
+)
+def compute_monthly_stats(cleaned_data: List[CleanedData]) -> List[Path]:
     """
-    Compute monthly statistics (high, low, average) for a currency pair.
+    Compute monthly statistics (high, low, average) for all currency pairs.
 
     Args:
-        file_path: Path to the cleaned CSV file
+        cleaned_data: List of cleaned currency data
 
     Returns:
-        Path to the saved monthly stats CSV file
+        List of paths to the saved monthly stats CSV files
     """
-    # Extract the currency pair from the file name
-    file_name = file_path.name
-
-    # The file name is in the format "EUR_USD.csv"
-    currency_pair = file_name.replace(".csv", "")
-
-    # Construct the output file path
-    output_file = DATA_DIR / f"{currency_pair}_monthly_stats.csv"
+    # In cleaned files, column names are standardized
+    date_column = 'DATE'
+    value_column = 'RATE'
 
-    try:
-        # Read the cleaned CSV file
-        df = pd.read_csv(file_path)
-
-        # In cleaned files, column names are standardized
-        date_column = 'DATE'
-        value_column = 'RATE'
-
-        if date_column in df.columns and value_column in df.columns:
-            # Convert date column to datetime
-            df[date_column] = pd.to_datetime(df[date_column])
-
-            # Extract year and month
-            df['year'] = df[date_column].dt.year
-            df['month'] = df[date_column].dt.month
-
-            # Group by year and month and compute statistics
-            monthly_stats = df.groupby(['year', 'month'])[value_column].agg(['min', 'max', 'mean']).reset_index()
-            monthly_stats.columns = ['year', 'month', 'low', 'high', 'average']
+    usable = []
+    for cleaned in cleaned_data:
+        if date_column in cleaned.df.columns and value_column in cleaned.df.columns:
+            usable.append(cleaned)
+        else:
+            print(f"Warning: Required columns not found in {cleaned.path}")
 
-            # Add month_str column (YYYY-MM format)
-            monthly_stats['month_str'] = monthly_stats.apply(
-                lambda row: f"{int(row['year'])}-{int(row['month']):02d}", axis=1
-            )
+    if not usable:
+        return []
 
-            # Reorder columns
-            monthly_stats = monthly_stats[['month_str', 'low', 'high', 'average']]
+    output_files = []
 
-            # Write to CSV
-            monthly_stats.to_csv(output_file, index=False)
+    try:
+        # Concatenate all pairs into one frame tagged with the pair name
+        # (the file stem, e.g. "EUR_USD.parquet" -> "EUR_USD") so a single
+        # groupby pass replaces one groupby per pair
+        all_df = pd.concat(
+            [cleaned.df.assign(pair=cleaned.path.stem) for cleaned in usable],
+            ignore_index=True,
+        )
+
+        # ECB dates are fixed-width YYYY-MM-DD strings, so the YYYY-MM
+        # month key is just the first seven characters - a vectorized
+        # slice instead of running every date through the datetime parser.
+        # Lexicographic order of the keys is chronological order.
+        month_str = all_df[date_column].str.slice(0, 7).rename('month_str')
+        monthly_stats = (
+            all_df.groupby([all_df['pair'], month_str], observed=True)[value_column]
+            .agg(low='min', high='max', average='mean')
+            .reset_index()
+        )
+
+        # Split the combined result back into one stats file per pair
+        for currency_pair, pair_stats in monthly_stats.groupby('pair', observed=True):
+            output_file = DATA_DIR / f"{currency_pair}_monthly_stats.csv"
+
+            # Write to CSV, atomically via a temp file
+            tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+            pair_stats[['month_str', 'low', 'high', 'average']].to_csv(tmp_file, index=False)
+            os.replace(tmp_file, output_file)
 
             print(f"Saved monthly stats for {currency_pair} to {output_file}")
-        else:
-            print(f"Warning: Required columns not found in {file_path}")
-            return None
+            output_files.append(output_file)
     except Exception as e:
-        print(f"Error computing monthly stats for {file_path}: {e}")
-        return None
+        print(f"Error computing monthly stats: {e}")
+        return []
 
-    return output_file
+    return output_files
 
 
-@flow(name="Compute Monthly Stats Flow")
-def compute_monthly_stats_flow(input_files: List[Path]) -> List[Path]:
+@task(cache_key_fn=task_input_hash, cache_expiration=timedelta(hours=24), persist_result=True)
+def generate_expected_months(dates_file: Path) -> List[str]:
     """
-    Compute monthly statistics for all currency pairs.
+    Generate a list of expected months from the minimum date to the maximum date.
 
     Args:
-        input_files: List of paths to the downloaded CSV files
+        dates_file: Path to the dates CSV file
 
     Returns:
-        List of paths to the saved monthly stats CSV files
+        List of months in YYYY-MM format
     """
-    # Compute monthly stats for each file
-    output_files = []
-    for file_path in input_files:
-        output_file = compute_monthly_stats(file_path)
-        if output_file:
-            output_files.append(output_file)
+    # Read the dates CSV file with the Arrow engine and Arrow-backed dtypes;
+    # the multithreaded parser and Arrow strings beat the numpy object path
+    dates = pd.read_csv(dates_file, engine="pyarrow", dtype_backend="pyarrow")['date']
 
-    return output_files
+    if dates.empty:
+        return []
+
+    # Parse all dates in one vectorized pass
+    date_objects = pd.to_datetime(dates)
+
+    # Snap the minimum and maximum dates to the start of their months
+    start = date_objects.min().to_period('M').to_timestamp()
+    end = date_objects.max().to_period('M').to_timestamp()
+
+    # Enumerate every month start between them
+    return pd.date_range(start, end, freq='MS').strftime('%Y-%m').tolist()
 
 
 @task
-def generate_expected_months(dates_file: Path) -> List[str]:
+def make_month_set(months: List[str]) -> FrozenSet[str]:
     """
-    Generate a list of expected months from the minimum date to the maximum date.
+    Convert a list of months to a frozenset for O(1) membership tests.
 
     Args:
-        dates_file: Path to the dates CSV file
+        months: List of months in YYYY-MM format
 
     Returns:
-        List of months in YYYY-MM format
+        The months as a frozenset
     """
-    # Read the dates CSV file
-    with open(dates_file, "r") as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        dates = [row[0] for row in reader]
+    return frozenset(months)
 
-    if not dates:
-        return []
-
-    # Convert dates to datetime objects
-    date_objects = [pd.to_datetime(date) for date in dates]
-
-    # Find the minimum and maximum dates
-    min_date = min(date_objects)
-    max_date = max(date_objects)
-
-    # Generate a list of all months between min_date and max_date
-    expected_months = []
-    current_date = pd.Timestamp(year=min_date.year, month=min_date.month, day=1)
 
-    while current_date <= max_date:
-        expected_months.append(current_date.strftime("%Y-%m"))
-        # Move to the next month
-        if current_date.month == 12:
-            current_date = pd.Timestamp(year=current_date.year + 1, month=1, day=1)
-        else:
-            current_date = pd.Timestamp(year=current_date.year, month=current_date.month + 1, day=1)
+def _write_missing_months(output_file: Path, currency_pair: str, months: List[str]) -> None:
+    """
+    Write a missing-data CSV in one call, atomically via a temp file.
 
-    return expected_months
+    The values are a currency-pair slug and YYYY-MM strings, so no CSV
+    escaping is needed.
+    """
+    lines = ["currency_pair,month"] + [f"{currency_pair},{month}" for month in months]
+    tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+    tmp_file.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_file, output_file)
 
 
 @task
-def identify_missing_data_for_pair(currency_pair: str, expected_months: List[str]) -> Path:
+def identify_missing_data_for_pair(currency_pair: str, expected_months: FrozenSet[str]) -> Path:
     """
     Identify missing data for a currency pair.
 
     Args:
         currency_pair: Currency pair (e.g., "EUR_USD")
-        expected_months: List of expected months
+        expected_months: Set of expected months
 
     Returns:
         Path to the saved missing data CSV file
@@ -446,29 +508,21 @@ def identify_missing_data_for_pair(currency_pair: str, expected_months: List[str
     # If the monthly stats file doesn't exist, all months are missing
     if not monthly_stats_file.exists():
         print(f"Warning: Monthly stats file for {currency_pair} does not exist")
-        with open(output_file, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["currency_pair", "month"])
-            for month in expected_months:
-                writer.writerow([currency_pair, month])
+        _write_missing_months(output_file, currency_pair, sorted(expected_months))
         return output_file
 
     # Read the monthly stats file
     try:
-        monthly_stats = pd.read_csv(monthly_stats_file)
-
-        # Get the list of months in the monthly stats file
-        available_months = set(monthly_stats["month_str"])
+        # Only the month_str column matters here, so skip pandas and pull it
+        # straight out of the rows with the stdlib csv reader
+        with open(monthly_stats_file, "r", newline="") as f:
+            available_months = {row["month_str"] for row in csv.DictReader(f)}
 
         # Find missing months
-        missing_months = [month for month in expected_months if month not in available_months]
+        missing_months = [month for month in sorted(expected_months) if month not in available_months]
 
         # Write missing months to CSV
-        with open(output_file, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["currency_pair", "month"])
-            for month in missing_months:
-                writer.writerow([currency_pair, month])
+        _write_missing_months(output_file, currency_pair, missing_months)
 
         print(f"Saved missing data for {currency_pair} to {output_file}")
     except Exception as e:
@@ -478,45 +532,38 @@ def identify_missing_data_for_pair(currency_pair: str, expected_months: List[str
     return output_file
 
 
-@flow(name="Identify Missing Data Flow")
-def identify_missing_data_flow(pairs_file: Path, dates_file: Path) -> List[Path]:
+@flow(name="Identify Missing Data Flow", task_runner=ConcurrentTaskRunner())
+def identify_missing_data_flow(currency_pairs: List[str], dates_file: Path) -> List[Path]:
     """
     Identify missing data for all currency pairs.
 
     Args:
-        pairs_file: Path to the pairs CSV file
+        currency_pairs: List of currency pairs (e.g., "EUR_USD")
         dates_file: Path to the dates CSV file
 
     Returns:
         List of paths to the saved missing data CSV files
     """
-    # Generate expected months
-    expected_months = generate_expected_months(dates_file)
-
-    # Read the pairs CSV file
-    with open(pairs_file, "r") as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        currency_pairs = [row[0] for row in reader]
+    # Generate the expected months once; passing the future to the per-pair
+    # submissions shares the one resolved frozenset instead of re-serializing
+    # the month list for every pair
+    expected_months = generate_expected_months.submit(dates_file)
+    expected_month_set = make_month_set.submit(expected_months)
 
-    # Identify missing data for each currency pair
-    missing_data_files = []
-    for currency_pair in currency_pairs:
-        missing_data_file = identify_missing_data_for_pair(currency_pair, expected_months)
-        if missing_data_file:
-            missing_data_files.append(missing_data_file)
+    # Identify missing data for the currency pairs in parallel; the month set
+    # is unmapped so every pair gets the same one
+    futures = identify_missing_data_for_pair.map(currency_pairs, unmapped(expected_month_set))
 
-    return missing_data_files
+    return [result for result in (future.result() for future in futures) if result]
 
 
 @task
-def aggregate_missing_data(missing_data_files: List[Path], pairs_file: Path) -> Path:
+def aggregate_missing_data(missing_data_files: List[Path]) -> Path:
     """
     Aggregate missing data from all currency pairs into a single file.
 
     Args:
         missing_data_files: List of paths to the missing data CSV files
-        pairs_file: Path to the pairs CSV file
 
     Returns:
         Path to the saved aggregate missing data CSV file
@@ -524,56 +571,35 @@ def aggregate_missing_data(missing_data_files: List[Path], pairs_file: Path) ->
     # Construct the output file path
     output_file = DATA_DIR / "missing_data.csv"
 
-    # Read all currency pairs from pairs.csv
-    with open(pairs_file, "r") as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        all_currency_pairs = set(row[0] for row in reader)
-
-    # Collect all missing data
-    all_missing_data = []
-
-    for file_path in missing_data_files:
-        try:
-            with open(file_path, "r") as f:
-                reader = csv.reader(f)
-                next(reader)  # Skip header
-                for row in reader:
-                    if len(row) >= 2:
-                        currency_pair, month = row[0], row[1]
-                        all_missing_data.append((currency_pair, month))
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-
-    # Write the aggregate missing data to a CSV file
-    with open(output_file, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["currency_pair", "month"])
-
-        # Sort by currency pair and month
-        for currency_pair, month in sorted(all_missing_data):
-            writer.writerow([currency_pair, month])
+    if missing_data_files:
+        # Read and combine the per-pair files in Arrow so the parse, the
+        # concatenation and the sort all run in C++. The column types are
+        # pinned so header-only files concatenate cleanly.
+        convert_options = pacsv.ConvertOptions(
+            column_types={"currency_pair": pa.string(), "month": pa.string()}
+        )
+        tables = [
+            pacsv.read_csv(file_path, convert_options=convert_options)
+            for file_path in missing_data_files
+        ]
+        combined = pa.concat_tables(tables).sort_by(
+            [("currency_pair", "ascending"), ("month", "ascending")]
+        )
+        tmp_file = output_file.with_suffix(output_file.suffix + ".tmp")
+        # The values are pair slugs and YYYY-MM months, so the rows need no
+        # quoting (Arrow always quotes the header line)
+        pacsv.write_csv(combined, tmp_file, write_options=pacsv.WriteOptions(quoting_style="none"))
+        os.replace(tmp_file, output_file)
+    else:
+        # No per-pair files, so just write the header
+        with open(output_file, "w", newline="") as f:
+            csv.writer(f).writerow(["currency_pair", "month"])
 
     print(f"Saved aggregate missing data to {output_file}")
 
     return output_file
 
 
-@flow(name="Aggregate Missing Data Flow")
-def aggregate_missing_data_flow(missing_data_files: List[Path], pairs_file: Path) -> Path:
-    """
-    Aggregate missing data from all currency pairs.
-
-    Args:
-        missing_data_files: List of paths to the missing data CSV files
-        pairs_file: Path to the pairs CSV file
-
-    Returns:
-        Path to the saved aggregate missing data CSV file
-    """
-    return aggregate_missing_data(missing_data_files, pairs_file)
-
-
 @flow(name="Currency Exchange Rate Pipeline")
 def currency_exchange_rate_pipeline():
     """
@@ -583,26 +609,28 @@ def currency_exchange_rate_pipeline():
     downloaded_files = download_currency_data_flow()
 
     # Step 2: Clean up downloaded data
-    cleaned_files = clean_up_currency_data_flow(downloaded_files)
+    cleaned_data = clean_up_currency_data_flow(downloaded_files)
 
-    # Step 3: Collect currency pairs
-    pairs_file = collect_currency_pairs_flow(cleaned_files)
+    # Step 3: Collect currency pairs (kept for observability; the pair list
+    # itself is static, so nothing downstream needs to read pairs.csv back)
+    pairs_file = collect_currency_pairs_flow(cleaned_data)
 
     # Step 4: Collect dates
-    dates_file = collect_dates_flow(cleaned_files)
+    dates_file = collect_dates_flow(cleaned_data)
 
-    # Step 5: Compute monthly stats
-    monthly_stats_files = compute_monthly_stats_flow(cleaned_files)
+    # Step 5: Compute monthly stats for all pairs in one pass
+    monthly_stats_files = compute_monthly_stats(cleaned_data)
 
-    # Step 6: Identify missing data
-    missing_data_files = identify_missing_data_flow(pairs_file, dates_file)
+    # Step 6: Identify missing data for the statically known currency pairs
+    currency_pairs = [f"EUR_{currency}" for currency in CURRENCY_PAIRS]
+    missing_data_files = identify_missing_data_flow(currency_pairs, dates_file)
 
     # Step 7: Aggregate missing data
-    aggregate_file = aggregate_missing_data_flow(missing_data_files, pairs_file)
+    aggregate_file = aggregate_missing_data(missing_data_files)
 
     return {
         "downloaded_files": downloaded_files,
-        "cleaned_files": cleaned_files,
+        "cleaned_files": [cleaned.path for cleaned in cleaned_data],
         "pairs_file": pairs_file,
         "dates_file": dates_file,
         "monthly_stats_files": monthly_stats_files,
@@ -64,12 +64,12 @@ class TestPipeline(unittest.TestCase):
 
             # Check that the file has the correct name format
             file_name = file_path.name
-            self.assertFalse(file_name.startswith("ECB_"))  # Should not have ECB_ prefix
-            self.assertTrue(file_name.startswith("EUR_"))   # Should start with EUR_
-            self.assertTrue(file_name.endswith(".csv"))     # Should end with .csv
+            self.assertFalse(file_name.startswith("ECB_"))    # Should not have ECB_ prefix
+            self.assertTrue(file_name.startswith("EUR_"))     # Should start with EUR_
+            self.assertTrue(file_name.endswith(".parquet"))   # Should end with .parquet
 
             # Extract the currency from the file name
-            currency = file_name.replace("EUR_", "").replace(".csv", "")
+            currency = file_path.stem.replace("EUR_", "")
             self.assertIn(currency, CURRENCY_PAIRS)
 
         # 3. Check pairs file